@@ -31,4 +31,15 @@ pub fn build(b: *std.Build) void {
 
     const run_step = b.step("run", "Run the bot");
     run_step.dependOn(&run_cmd.step);
+
+    const matcher_tests = b.addTest(.{
+        .root_module = b.createModule(.{
+            .root_source_file = b.path("src/matcher.zig"),
+            .target = target,
+            .optimize = optimize,
+        }),
+    });
+
+    const test_step = b.step("test", "Run unit tests");
+    test_step.dependOn(&b.addRunArtifact(matcher_tests).step);
 }
@@ -16,6 +16,9 @@ fn timestamp() i64 {
     return @intCast(@divFloor(Io.Timestamp.now(io, .real).nanoseconds, std.time.ns_per_s));
 }
 
+// the image resize proxy caps non-GIF bufos at 900000 bytes (see tryPost in main.zig)
+const image_initial_capacity = 1024 * 1024;
+
 pub const BskyClient = struct {
     allocator: Allocator,
     handle: []const u8,
@@ -23,12 +26,16 @@ pub const BskyClient = struct {
     access_jwt: ?[]const u8 = null,
     did: ?[]const u8 = null,
     pds_host: ?[]const u8 = null,
+    // shared across requests so keep-alive connections to the same hosts are reused
+    http_client: http.Client,
+    image_cache: ImageCache = .{},
 
     pub fn initClient(allocator: Allocator, handle: []const u8, app_password: []const u8) BskyClient {
         return .{
             .allocator = allocator,
             .handle = handle,
             .app_password = app_password,
+            .http_client = .{ .allocator = allocator, .io = io },
         };
     }
 
@@ -36,18 +43,28 @@ pub const BskyClient = struct {
         if (self.access_jwt) |jwt| self.allocator.free(jwt);
         if (self.did) |did| self.allocator.free(did);
         if (self.pds_host) |host| self.allocator.free(host);
+        self.http_client.deinit();
+        self.image_cache.deinit(self.allocator);
     }
 
-    fn httpClient(self: *BskyClient) http.Client {
-        return .{ .allocator = self.allocator, .io = io };
+    /// http_client.fetch, with GETs retried once on connection-level errors. servers drop
+    /// idle keep-alive connections, and with matches minutes apart the pooled one is often dead.
+    fn fetch(self: *BskyClient, options: http.Client.FetchOptions) !http.Client.FetchResult {
+        return self.http_client.fetch(options) catch |err| {
+            // these errors can also come while reading the response, after the server acted on
+            // the request. only GETs are safe to resend; a retried createRecord would publish
+            // a duplicate quote-post, so POST failures surface as before
+            if (options.method != .GET or !isConnectionError(err)) return err;
+            std.debug.print("connection error ({}), retrying on a fresh connection\n", .{err});
+            // every response writer here is an Io.Writer.Allocating; drop any partial body
+            if (options.response_writer) |w| w.end = 0;
+            return self.http_client.fetch(options);
+        };
     }
 
     pub fn login(self: *BskyClient) !void {
         std.debug.print("logging in as {s}...\n", .{self.handle});
 
-        var client = self.httpClient();
-        defer client.deinit();
-
         var body_buf: std.ArrayList(u8) = .empty;
         defer body_buf.deinit(self.allocator);
         try body_buf.print(self.allocator, "{{\"identifier\":\"{s}\",\"password\":\"{s}\"}}", .{ self.handle, self.app_password });
@@ -55,7 +72,7 @@ pub const BskyClient = struct {
         var aw: Io.Writer.Allocating = .init(self.allocator);
         defer aw.deinit();
 
-        const result = client.fetch(.{
+        const result = self.fetch(.{
             .location = .{ .url = "https://bsky.social/xrpc/com.atproto.server.createSession" },
             .method = .POST,
             .headers = .{ .content_type = .{ .override = "application/json" } },
@@ -93,16 +110,13 @@ pub const BskyClient = struct {
     }
 
     fn fetchPdsHost(self: *BskyClient) !void {
-        var client = self.httpClient();
-        defer client.deinit();
-
         var url_buf: [256]u8 = undefined;
         const url = std.fmt.bufPrint(&url_buf, "https://plc.directory/{s}", .{self.did.?}) catch return error.UrlTooLong;
 
         var aw: Io.Writer.Allocating = .init(self.allocator);
         defer aw.deinit();
 
-        const result = client.fetch(.{
+        const result = self.fetch(.{
             .location = .{ .url = url },
             .method = .GET,
             .response_writer = &aw.writer,
@@ -148,16 +162,13 @@ pub const BskyClient = struct {
     pub fn uploadBlob(self: *BskyClient, data: []const u8, content_type: []const u8) ![]const u8 {
         if (self.access_jwt == null) return error.NotLoggedIn;
 
-        var client = self.httpClient();
-        defer client.deinit();
-
         var auth_buf: [512]u8 = undefined;
         const auth_header = std.fmt.bufPrint(&auth_buf, "Bearer {s}", .{self.access_jwt.?}) catch return error.AuthTooLong;
 
         var aw: Io.Writer.Allocating = .init(self.allocator);
         defer aw.deinit();
 
-        const result = client.fetch(.{
+        const result = self.fetch(.{
             .location = .{ .url = "https://bsky.social/xrpc/com.atproto.repo.uploadBlob" },
             .method = .POST,
             .headers = .{
@@ -193,16 +204,13 @@ pub const BskyClient = struct {
     }
 
     pub fn isBlockedBy(self: *BskyClient, target_did: []const u8) !bool {
-        var client = self.httpClient();
-        defer client.deinit();
-
         var url_buf: [512]u8 = undefined;
         const url = std.fmt.bufPrint(&url_buf, "https://public.api.bsky.app/xrpc/app.bsky.graph.getRelationships?actor={s}&others={s}", .{ self.did.?, target_did }) catch return error.UrlTooLong;
 
         var aw: Io.Writer.Allocating = .init(self.allocator);
         defer aw.deinit();
 
-        const result = client.fetch(.{
+        const result = self.fetch(.{
             .location = .{ .url = url },
             .method = .GET,
             .response_writer = &aw.writer,
@@ -239,9 +247,6 @@ pub const BskyClient = struct {
     pub fn createQuotePost(self: *BskyClient, quote_uri: []const u8, quote_cid: []const u8, blob_json: []const u8, alt_text: []const u8) ![]const u8 {
         if (self.access_jwt == null or self.did == null) return error.NotLoggedIn;
 
-        var client = self.httpClient();
-        defer client.deinit();
-
         var body_buf: std.ArrayList(u8) = .empty;
         defer body_buf.deinit(self.allocator);
 
@@ -256,7 +261,7 @@ pub const BskyClient = struct {
         var aw: Io.Writer.Allocating = .init(self.allocator);
         defer aw.deinit();
 
-        const result = client.fetch(.{
+        const result = self.fetch(.{
             .location = .{ .url = "https://bsky.social/xrpc/com.atproto.repo.createRecord" },
             .method = .POST,
             .headers = .{
@@ -283,9 +288,6 @@ pub const BskyClient = struct {
     pub fn getPostCid(self: *BskyClient, uri: []const u8) ![]const u8 {
         if (self.access_jwt == null) return error.NotLoggedIn;
 
-        var client = self.httpClient();
-        defer client.deinit();
-
         var parts = mem.splitScalar(u8, uri[5..], '/');
         const did = parts.next() orelse return error.InvalidUri;
         _ = parts.next();
@@ -300,7 +302,7 @@ pub const BskyClient = struct {
         var aw: Io.Writer.Allocating = .init(self.allocator);
         defer aw.deinit();
 
-        const result = client.fetch(.{
+        const result = self.fetch(.{
             .location = .{ .url = url },
             .method = .GET,
             .headers = .{ .authorization = .{ .override = auth_header } },
@@ -324,14 +326,16 @@ pub const BskyClient = struct {
         return try self.allocator.dupe(u8, cid_val.string);
     }
 
+    /// returned bytes are owned by the client's image cache and stay valid until the next fetchImage
     pub fn fetchImage(self: *BskyClient, url: []const u8) ![]const u8 {
-        var client = self.httpClient();
-        defer client.deinit();
+        if (self.image_cache.get(url)) |data| return data;
 
-        var aw: Io.Writer.Allocating = .init(self.allocator);
+        // sized for the resize proxy's output so the body is written in place instead of
+        // growing (and briefly holding two copies of) the buffer as chunks arrive
+        var aw = try Io.Writer.Allocating.initCapacity(self.allocator, image_initial_capacity);
         errdefer aw.deinit();
 
-        const result = client.fetch(.{
+        const result = self.fetch(.{
             .location = .{ .url = url },
             .method = .GET,
             .response_writer = &aw.writer,
@@ -341,19 +345,19 @@ pub const BskyClient = struct {
         };
 
         if (result.status != .ok) {
-            aw.deinit();
             return error.FetchFailed;
         }
 
-        return try aw.toOwnedSlice();
+        const data = try aw.toOwnedSlice();
+        errdefer self.allocator.free(data);
+        const owned_url = try self.allocator.dupe(u8, url);
+        self.image_cache.put(self.allocator, owned_url, data);
+        return data;
     }
 
     pub fn getServiceAuth(self: *BskyClient) ![]const u8 {
         if (self.access_jwt == null or self.did == null or self.pds_host == null) return error.NotLoggedIn;
 
-        var client = self.httpClient();
-        defer client.deinit();
-
         var url_buf: [512]u8 = undefined;
         const url = std.fmt.bufPrint(&url_buf, "https://bsky.social/xrpc/com.atproto.server.getServiceAuth?aud=did:web:{s}&lxm=com.atproto.repo.uploadBlob", .{self.pds_host.?}) catch return error.UrlTooLong;
 
@@ -363,7 +367,7 @@ pub const BskyClient = struct {
         var aw: Io.Writer.Allocating = .init(self.allocator);
         defer aw.deinit();
 
-        const result = client.fetch(.{
+        const result = self.fetch(.{
             .location = .{ .url = url },
             .method = .GET,
             .headers = .{ .authorization = .{ .override = auth_header } },
@@ -400,9 +404,6 @@ pub const BskyClient = struct {
         const service_token = try self.getServiceAuth();
         defer self.allocator.free(service_token);
 
-        var client = self.httpClient();
-        defer client.deinit();
-
         var url_buf: [512]u8 = undefined;
         const url = std.fmt.bufPrint(&url_buf, "https://video.bsky.app/xrpc/app.bsky.video.uploadVideo?did={s}&name={s}", .{ self.did.?, filename }) catch return error.UrlTooLong;
 
@@ -412,7 +413,7 @@ pub const BskyClient = struct {
         var aw: Io.Writer.Allocating = .init(self.allocator);
         defer aw.deinit();
 
-        const result = client.fetch(.{
+        const result = self.fetch(.{
             .location = .{ .url = url },
             .method = .POST,
             .headers = .{
@@ -470,13 +471,10 @@ pub const BskyClient = struct {
 
         var attempts: u32 = 0;
         while (attempts < 60) : (attempts += 1) {
-            var client = self.httpClient();
-            defer client.deinit();
-
             var aw: Io.Writer.Allocating = .init(self.allocator);
             defer aw.deinit();
 
-            const result = client.fetch(.{
+            const result = self.fetch(.{
                 .location = .{ .url = url },
                 .method = .GET,
                 .headers = .{ .authorization = .{ .override = auth_header } },
@@ -519,9 +517,6 @@ pub const BskyClient = struct {
     pub fn createVideoQuotePost(self: *BskyClient, quote_uri: []const u8, quote_cid: []const u8, blob_json: []const u8, alt_text: []const u8) ![]const u8 {
         if (self.access_jwt == null or self.did == null) return error.NotLoggedIn;
 
-        var client = self.httpClient();
-        defer client.deinit();
-
         var body_buf: std.ArrayList(u8) = .empty;
         defer body_buf.deinit(self.allocator);
 
@@ -536,7 +531,7 @@ pub const BskyClient = struct {
         var aw: Io.Writer.Allocating = .init(self.allocator);
         defer aw.deinit();
 
-        const result = client.fetch(.{
+        const result = self.fetch(.{
             .location = .{ .url = "https://bsky.social/xrpc/com.atproto.repo.createRecord" },
             .method = .POST,
             .headers = .{
@@ -563,9 +558,6 @@ pub const BskyClient = struct {
     pub fn deleteRecord(self: *BskyClient, rkey: []const u8) !void {
         if (self.access_jwt == null or self.did == null) return error.NotLoggedIn;
 
-        var client = self.httpClient();
-        defer client.deinit();
-
         var body_buf: std.ArrayList(u8) = .empty;
         defer body_buf.deinit(self.allocator);
 
@@ -579,7 +571,7 @@ pub const BskyClient = struct {
         var aw: Io.Writer.Allocating = .init(self.allocator);
         defer aw.deinit();
 
-        const result = client.fetch(.{
+        const result = self.fetch(.{
             .location = .{ .url = "https://bsky.social/xrpc/com.atproto.repo.deleteRecord" },
             .method = .POST,
             .headers = .{
@@ -614,16 +606,13 @@ pub const BskyClient = struct {
     pub fn getAuthorFeed(self: *BskyClient, buf: []FeedPost) ![]FeedPost {
         if (self.did == null) return error.NotLoggedIn;
 
-        var client = self.httpClient();
-        defer client.deinit();
-
         var url_buf: [512]u8 = undefined;
         const url = std.fmt.bufPrint(&url_buf, "https://public.api.bsky.app/xrpc/app.bsky.feed.getAuthorFeed?actor={s}&limit=100&filter=posts_no_replies", .{self.did.?}) catch return error.UrlTooLong;
 
         var aw: Io.Writer.Allocating = .init(self.allocator);
         defer aw.deinit();
 
-        const result = client.fetch(.{
+        const result = self.fetch(.{
             .location = .{ .url = url },
             .method = .GET,
             .headers = .{ .accept_encoding = .{ .override = "identity" } },
@@ -727,6 +716,81 @@ pub const BskyClient = struct {
     }
 };
 
+/// least-recently-used cache of fetched bufo images, bounded by entry count and total bytes.
+/// not synchronized: callers serialize posting through the bot mutex.
+const ImageCache = struct {
+    const max_entries = 32;
+    const max_bytes = 32 * 1024 * 1024;
+
+    entries: [max_entries]Entry = undefined,
+    len: usize = 0,
+    total_bytes: usize = 0,
+    clock: u64 = 0,
+
+    const Entry = struct {
+        url: []const u8,
+        data: []const u8,
+        last_used: u64,
+    };
+
+    fn deinit(self: *ImageCache, allocator: Allocator) void {
+        for (self.entries[0..self.len]) |entry| {
+            allocator.free(entry.url);
+            allocator.free(entry.data);
+        }
+        self.len = 0;
+        self.total_bytes = 0;
+    }
+
+    fn get(self: *ImageCache, url: []const u8) ?[]const u8 {
+        for (self.entries[0..self.len]) |*entry| {
+            if (mem.eql(u8, entry.url, url)) {
+                self.clock += 1;
+                entry.last_used = self.clock;
+                return entry.data;
+            }
+        }
+        return null;
+    }
+
+    /// takes ownership of url and data. an image larger than max_bytes is still kept
+    /// (alone) so the caller's slice stays valid; the next put evicts it.
+    fn put(self: *ImageCache, allocator: Allocator, url: []const u8, data: []const u8) void {
+        while (self.len > 0 and (self.len == max_entries or self.total_bytes + data.len > max_bytes)) {
+            self.evictOldest(allocator);
+        }
+
+        self.clock += 1;
+        self.entries[self.len] = .{ .url = url, .data = data, .last_used = self.clock };
+        self.len += 1;
+        self.total_bytes += data.len;
+    }
+
+    fn evictOldest(self: *ImageCache, allocator: Allocator) void {
+        var oldest: usize = 0;
+        for (self.entries[1..self.len], 1..) |entry, i| {
+            if (entry.last_used < self.entries[oldest].last_used) oldest = i;
+        }
+
+        const evicted = self.entries[oldest];
+        allocator.free(evicted.url);
+        allocator.free(evicted.data);
+        self.total_bytes -= evicted.data.len;
+
+        self.len -= 1;
+        self.entries[oldest] = self.entries[self.len];
+    }
+};
+
+fn isConnectionError(err: anyerror) bool {
+    return err == error.ConnectionResetByPeer or
+        err == error.BrokenPipe or
+        err == error.EndOfStream or
+        err == error.ReadFailed or
+        err == error.WriteFailed or
+        err == error.HttpConnectionClosing;
+}
+
 fn getIsoTimestamp(buf: *[30]u8) []const u8 {
     const ts = timestamp();
     const epoch_secs: u64 = @intCast(ts);
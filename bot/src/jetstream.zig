@@ -11,7 +11,7 @@ const nsfw_labels: []const []const u8 = &.{
     "gore",
 };
 
-// hashtags/keywords to filter in post text (lowercase)
+// hashtags to filter in post text (lowercase, each must start with '#')
 const nsfw_keywords: []const []const u8 = &.{
     "#nsfw",
     "#porn",
@@ -28,10 +28,14 @@ const nsfw_keywords: []const []const u8 = &.{
 };
 
 pub const Post = struct {
-    uri: []const u8,
     text: []const u8,
     did: []const u8,
     rkey: []const u8,
+
+    /// at-uri of the post, formatted on demand since almost no posts need one
+    pub fn formatUri(self: Post, buf: []u8) ![]const u8 {
+        return std.fmt.bufPrint(buf, "at://{s}/app.bsky.feed.post/{s}", .{ self.did, self.rkey });
+    }
 };
 
 pub const PostHandler = struct {
@@ -90,11 +94,7 @@ pub const PostHandler = struct {
 
         if (hasNsfwKeywords(text)) return;
 
-        var uri_buf: [256]u8 = undefined;
-        const uri = std.fmt.bufPrint(&uri_buf, "at://{s}/app.bsky.feed.post/{s}", .{ c.did, c.rkey }) catch return;
-
         self.callback(.{
-            .uri = uri,
             .text = text,
             .did = c.did,
             .rkey = c.rkey,
@@ -115,6 +115,9 @@ fn hasNsfwLabels(record: json.Value) bool {
 }
 
 fn hasNsfwKeywords(text: []const u8) bool {
+    // every keyword is a hashtag, so most posts can skip the lowercase copy and scans
+    if (mem.indexOfScalar(u8, text, '#') == null) return false;
+
     var lower_buf: [4096]u8 = undefined;
     const len = @min(text.len, lower_buf.len);
     for (text[0..len], 0..) |c, i| {
@@ -19,6 +19,9 @@ pub const std_options_debug_threaded_io: ?*Io.Threaded = &app_threaded_io;
 
 var global_state: ?*BotState = null;
 
+// matches waiting on (or holding) the posting mutex; beyond this, new matches are dropped
+const max_pending_posts = 8;
+
 const BotState = struct {
     allocator: Allocator,
     config: config.Config,
@@ -26,6 +29,61 @@ const BotState = struct {
     bsky_client: bsky.BskyClient,
     mutex: Io.Mutex = Io.Mutex.init,
     stats: stats.Stats,
+    pending_posts: std.atomic.Value(u32) = .init(0),
+    in_flight: InFlight = .{},
+};
+
+/// posts handed to a worker but not yet tracked. a delete or block that arrives while the
+/// worker is still posting finds nothing in stats, so it cancels the in-flight entry instead
+/// and the worker cleans up after itself.
+const InFlight = struct {
+    mutex: Io.Mutex = Io.Mutex.init,
+    // pending_posts caps workers at max_pending_posts, so there is always a free slot
+    slots: [max_pending_posts]Slot = [_]Slot{.{}} ** max_pending_posts,
+
+    const Slot = struct {
+        // borrowed from the worker's owned post
+        did: []const u8 = "",
+        rkey: []const u8 = "",
+        used: bool = false,
+        cancelled: bool = false,
+    };
+
+    fn add(self: *InFlight, io: Io, did: []const u8, rkey: []const u8) ?usize {
+        self.mutex.lockUncancelable(io);
+        defer self.mutex.unlock(io);
+
+        for (&self.slots, 0..) |*slot, i| {
+            if (slot.used) continue;
+            slot.* = .{ .did = did, .rkey = rkey, .used = true };
+            return i;
+        }
+        return null;
+    }
+
+    fn remove(self: *InFlight, io: Io, i: usize) void {
+        self.mutex.lockUncancelable(io);
+        defer self.mutex.unlock(io);
+        self.slots[i] = .{};
+    }
+
+    fn isCancelled(self: *InFlight, io: Io, i: usize) bool {
+        self.mutex.lockUncancelable(io);
+        defer self.mutex.unlock(io);
+        return self.slots[i].cancelled;
+    }
+
+    /// cancel in-flight posts by did, and by rkey too if one is given
+    fn cancel(self: *InFlight, io: Io, did: []const u8, rkey: ?[]const u8) void {
+        self.mutex.lockUncancelable(io);
+        defer self.mutex.unlock(io);
+
+        for (&self.slots) |*slot| {
+            if (!slot.used or !mem.eql(u8, slot.did, did)) continue;
+            if (rkey) |rk| if (!mem.eql(u8, slot.rkey, rk)) continue;
+            slot.cancelled = true;
+        }
+    }
 };
 
 pub fn main() !void {
@@ -46,6 +104,7 @@ pub fn main() !void {
     // load bufos from API
     var m = matcher.Matcher.init(allocator, cfg.min_phrase_words);
     try loadBufos(allocator, &m, cfg.exclude_patterns, io);
+    try m.build();
     std.debug.print("loaded {} bufos with >= {} word phrases\n", .{ m.count(), cfg.min_phrase_words });
 
     if (m.count() == 0) {
@@ -53,16 +112,6 @@ pub fn main() !void {
         return;
     }
 
-    // init bluesky client
-    var bsky_client = bsky.BskyClient.initClient(allocator, cfg.bsky_handle, cfg.bsky_app_password);
-    defer bsky_client.deinit();
-
-    if (cfg.posting_enabled) {
-        try bsky_client.login();
-    } else {
-        std.debug.print("posting disabled, running in dry-run mode\n", .{});
-    }
-
     // init stats
     var bot_stats = stats.Stats.initStats(allocator);
     defer bot_stats.deinit();
@@ -71,14 +120,27 @@ pub fn main() !void {
     // prune tracked posts older than 30 days
     bot_stats.pruneOldPosts(30 * 86400);
 
-    // init state
+    // init state. the bluesky client is built in place: it owns a connection pool and CA
+    // bundle that worker threads share, so it must never be copied after use
     var state = BotState{
         .allocator = allocator,
         .config = cfg,
         .matcher = m,
-        .bsky_client = bsky_client,
+        .bsky_client = bsky.BskyClient.initClient(allocator, cfg.bsky_handle, cfg.bsky_app_password),
         .stats = bot_stats,
     };
+    defer {
+        // wait out any worker mid-request before tearing the client down
+        state.mutex.lockUncancelable(io);
+        state.bsky_client.deinit();
+        state.mutex.unlock(io);
+    }
+
+    if (cfg.posting_enabled) {
+        try state.bsky_client.login();
+    } else {
+        std.debug.print("posting disabled, running in dry-run mode\n", .{});
+    }
 
     global_state = &state;
 
@@ -96,8 +158,9 @@ pub fn main() !void {
     defer stats_thread.join();
 
     // start jetstream consumer (use zat defaults with optional preferred relay)
+    // posting_enabled is fixed for the process, so pick the post path once here
     var handler = jetstream.PostHandler{
-        .callback = onPost,
+        .callback = if (cfg.posting_enabled) &onPost else &onPostDryRun,
         .on_connect = onConnect,
         .on_delete = onDelete,
         .on_block = onBlock,
@@ -132,27 +195,79 @@ fn onConnect(host: []const u8) void {
     state.stats.setJetstreamHost(host);
 }
 
-fn onPost(post: jetstream.Post) void {
-    const state = global_state orelse return;
-    const io = app_threaded_io.io();
-
+/// count the post and record a match if it contains a bufo phrase
+fn matchPost(state: *BotState, post: jetstream.Post) ?matcher.Match {
     state.stats.incPostsChecked();
 
-    // check for match
-    const match = state.matcher.findMatch(post.text) orelse return;
+    const match = state.matcher.findMatch(post.text) orelse return null;
 
     state.stats.incMatchesFound();
     state.stats.incBufoMatch(match.name, match.url);
     std.debug.print("match: {s}\n", .{match.name});
+    return match;
+}
+
+fn onPostDryRun(post: jetstream.Post) void {
+    const state = global_state orelse return;
+    _ = matchPost(state, post) orelse return;
+    std.debug.print("posting disabled, skipping\n", .{});
+}
+
+fn onPost(post: jetstream.Post) void {
+    const state = global_state orelse return;
+    const match = matchPost(state, post) orelse return;
+
+    // posting is network-bound (and waits on video processing for GIFs), so hand it to a
+    // worker thread and keep this thread consuming the firehose
+    if (state.pending_posts.fetchAdd(1, .monotonic) >= max_pending_posts) {
+        _ = state.pending_posts.fetchSub(1, .monotonic);
+        std.debug.print("too many posts in flight, skipping {s}\n", .{match.name});
+        return;
+    }
+
+    // the event's strings are only valid during this callback
+    const owned = dupePost(state.allocator, post) catch {
+        _ = state.pending_posts.fetchSub(1, .monotonic);
+        state.stats.incErrors();
+        return;
+    };
+
+    // registered here on the firehose thread, so any later delete or block event sees it
+    const slot = state.in_flight.add(app_threaded_io.io(), owned.did, owned.rkey) orelse {
+        freePost(state.allocator, owned);
+        _ = state.pending_posts.fetchSub(1, .monotonic);
+        state.stats.incErrors();
+        return;
+    };
 
-    if (!state.config.posting_enabled) {
-        std.debug.print("posting disabled, skipping\n", .{});
+    const worker = Thread.spawn(.{}, handleMatch, .{ state, owned, match, slot }) catch |err| {
+        std.debug.print("failed to spawn post worker: {}\n", .{err});
+        state.in_flight.remove(app_threaded_io.io(), slot);
+        freePost(state.allocator, owned);
+        _ = state.pending_posts.fetchSub(1, .monotonic);
+        state.stats.incErrors();
         return;
+    };
+    worker.detach();
+}
+
+fn handleMatch(state: *BotState, post: jetstream.Post, match: matcher.Match, slot: usize) void {
+    const io = app_threaded_io.io();
+    defer {
+        state.in_flight.remove(io, slot);
+        freePost(state.allocator, post);
+        _ = state.pending_posts.fetchSub(1, .monotonic);
     }
 
     state.mutex.lockUncancelable(io);
     defer state.mutex.unlock(io);
 
+    // deleted, or its author blocked us, while this worker waited its turn
+    if (state.in_flight.isCancelled(io, slot)) {
+        std.debug.print("original post gone before posting {s}, skipping\n", .{match.name});
+        return;
+    }
+
     const now = timestamp(io);
 
     // per-bufo cooldown (scaled by match frequency, persisted across restarts)
@@ -180,7 +295,7 @@ fn onPost(post: jetstream.Post) void {
     }
 
     // try to post, with one retry on token expiration
-    tryPost(state, post, match, now) catch |err| {
+    tryPost(state, post, match, now, slot) catch |err| {
         if (err == error.ExpiredToken) {
             std.debug.print("token expired, re-logging in...\n", .{});
             state.bsky_client.login() catch |login_err| {
@@ -189,7 +304,7 @@ fn onPost(post: jetstream.Post) void {
                 return;
             };
             std.debug.print("re-login successful, retrying post...\n", .{});
-            tryPost(state, post, match, now) catch |retry_err| {
+            tryPost(state, post, match, now, slot) catch |retry_err| {
                 std.debug.print("retry failed: {}\n", .{retry_err});
                 state.stats.incErrors();
             };
@@ -199,7 +314,23 @@ fn onPost(post: jetstream.Post) void {
     };
 }
 
-fn tryPost(state: *BotState, post: jetstream.Post, match: matcher.Match, now: i64) !void {
+fn dupePost(allocator: Allocator, post: jetstream.Post) !jetstream.Post {
+    const text = try allocator.dupe(u8, post.text);
+    errdefer allocator.free(text);
+    const did = try allocator.dupe(u8, post.did);
+    errdefer allocator.free(did);
+    const rkey = try allocator.dupe(u8, post.rkey);
+
+    return .{ .text = text, .did = did, .rkey = rkey };
+}
+
+fn freePost(allocator: Allocator, post: jetstream.Post) void {
+    allocator.free(post.text);
+    allocator.free(post.did);
+    allocator.free(post.rkey);
+}
+
+fn tryPost(state: *BotState, post: jetstream.Post, match: matcher.Match, now: i64, slot: usize) !void {
     // fetch bufo image (route non-GIF images through resize proxy)
     const is_gif = mem.endsWith(u8, match.url, ".gif");
 
@@ -209,27 +340,17 @@ fn tryPost(state: *BotState, post: jetstream.Post, match: matcher.Match, now: i6
     else
         std.fmt.bufPrint(&url_buf, "{s}/api/image?url={s}&max_bytes=900000", .{ state.config.backend_url, match.url }) catch match.url;
 
+    // owned by the client's image cache; repeat matches of the same bufo skip the fetch
     const img_data = try state.bsky_client.fetchImage(fetch_url);
-    defer state.allocator.free(img_data);
-
-    // build alt text (name without extension, dashes to spaces)
-    var alt_buf: [128]u8 = undefined;
-    var alt_len: usize = 0;
-    for (match.name) |c| {
-        if (c == '-') {
-            alt_buf[alt_len] = ' ';
-        } else if (c == '.') {
-            break; // stop at extension
-        } else {
-            alt_buf[alt_len] = c;
-        }
-        alt_len += 1;
-        if (alt_len >= alt_buf.len - 1) break;
-    }
-    const alt_text = alt_buf[0..alt_len];
+
+    // alt text is built once per bufo when the matcher loads
+    const alt_text = match.alt_text;
+
+    var uri_buf: [256]u8 = undefined;
+    const uri = try post.formatUri(&uri_buf);
 
     // get post CID for quote
-    const cid = try state.bsky_client.getPostCid(post.uri);
+    const cid = try state.bsky_client.getPostCid(uri);
     defer state.allocator.free(cid);
 
     const our_rkey = if (is_gif) blk: {
@@ -242,7 +363,7 @@ fn tryPost(state: *BotState, post: jetstream.Post, match: matcher.Match, now: i6
         const blob_json = try state.bsky_client.waitForVideo(job_id);
         defer state.allocator.free(blob_json);
 
-        break :blk try state.bsky_client.createVideoQuotePost(post.uri, cid, blob_json, alt_text);
+        break :blk try state.bsky_client.createVideoQuotePost(uri, cid, blob_json, alt_text);
     } else blk: {
         // upload as image
         const content_type = if (mem.endsWith(u8, match.url, ".png"))
@@ -256,7 +377,7 @@ fn tryPost(state: *BotState, post: jetstream.Post, match: matcher.Match, now: i6
         const blob_json = try state.bsky_client.uploadBlob(img_data, content_type);
         defer state.allocator.free(blob_json);
 
-        break :blk try state.bsky_client.createQuotePost(post.uri, cid, blob_json, alt_text);
+        break :blk try state.bsky_client.createQuotePost(uri, cid, blob_json, alt_text);
     };
     defer state.allocator.free(our_rkey);
 
@@ -264,7 +385,19 @@ fn tryPost(state: *BotState, post: jetstream.Post, match: matcher.Match, now: i6
     state.stats.incPostsCreated();
 
     // track our post for cleanup on delete/block
-    state.stats.addTrackedPost(our_rkey, post.uri, post.did, now);
+    state.stats.addTrackedPost(our_rkey, uri, post.did, now);
+
+    // a delete or block that arrived while we were posting found nothing tracked. those
+    // handlers cancel before they look in stats, so checking after tracking misses neither;
+    // whichever side removes the tracked post deletes it
+    if (state.in_flight.isCancelled(app_threaded_io.io(), slot) and state.stats.removeByOurRkey(our_rkey)) {
+        std.debug.print("original post gone while posting, deleting our quote-post {s}\n", .{our_rkey});
+        state.bsky_client.deleteRecord(our_rkey) catch |err| {
+            std.debug.print("failed to delete post {s}: {}\n", .{ our_rkey, err });
+            state.stats.incErrors();
+        };
+        return;
+    }
 
     // update cooldown cache (persisted to disk)
     state.stats.setLastPosted(match.name, now);
@@ -272,29 +405,23 @@ fn tryPost(state: *BotState, post: jetstream.Post, match: matcher.Match, now: i6
 
 fn onDelete(did: []const u8, rkey: []const u8) void {
     const state = global_state orelse return;
-    const io = app_threaded_io.io();
 
     // construct the original URI and check if we quote-posted it
     var uri_buf: [256]u8 = undefined;
     const uri = std.fmt.bufPrint(&uri_buf, "at://{s}/app.bsky.feed.post/{s}", .{ did, rkey }) catch return;
 
+    // a worker may be quote-posting it right now; cancel before checking tracked posts
+    state.in_flight.cancel(app_threaded_io.io(), did, rkey);
+
     const our_rkey = state.stats.removeByOriginalUri(uri) orelse return;
-    defer state.allocator.free(our_rkey);
 
     std.debug.print("original post deleted ({s}), deleting our quote-post {s}\n", .{ uri, our_rkey });
 
-    state.mutex.lockUncancelable(io);
-    defer state.mutex.unlock(io);
-
-    state.bsky_client.deleteRecord(our_rkey) catch |err| {
-        std.debug.print("failed to delete our post: {}\n", .{err});
-        state.stats.incErrors();
-    };
+    spawnDeletes(state, &.{our_rkey});
 }
 
 fn onBlock(blocker_did: []const u8, subject_did: []const u8) void {
     const state = global_state orelse return;
-    const io = app_threaded_io.io();
 
     // only care if someone is blocking us
     const our_did = state.bsky_client.did orelse return;
@@ -302,29 +429,21 @@ fn onBlock(blocker_did: []const u8, subject_did: []const u8) void {
 
     std.debug.print("blocked by {s}, cleaning up our quote-posts of their content\n", .{blocker_did});
 
-    state.mutex.lockUncancelable(io);
-    defer state.mutex.unlock(io);
+    // stop any in-flight posts quoting them; cancel before checking tracked posts
+    state.in_flight.cancel(app_threaded_io.io(), blocker_did, null);
 
     // collect and remove tracked posts from this DID
     var rkey_buf: [64][]const u8 = undefined;
     const rkeys = state.stats.removeByOriginalDid(blocker_did, &rkey_buf);
 
-    for (rkeys) |rk| {
-        state.bsky_client.deleteRecord(rk) catch |err| {
-            std.debug.print("failed to delete post {s}: {}\n", .{ rk, err });
-            state.stats.incErrors();
-        };
-        state.allocator.free(rk);
-    }
-
     if (rkeys.len > 0) {
-        std.debug.print("deleted {} quote-posts after block from {s}\n", .{ rkeys.len, blocker_did });
+        std.debug.print("deleting {} quote-posts after block from {s}\n", .{ rkeys.len, blocker_did });
+        spawnDeletes(state, rkeys);
     }
 }
 
 fn onDetach(_: []const u8, record: json.Value) void {
     const state = global_state orelse return;
-    const io = app_threaded_io.io();
 
     // postgate record has detachedEmbeddingUris: array of AT-URIs that should no longer embed
     const uris = record.object.get("detachedEmbeddingUris") orelse return;
@@ -332,10 +451,16 @@ fn onDetach(_: []const u8, record: json.Value) void {
 
     const our_did = state.bsky_client.did orelse return;
 
-    state.mutex.lockUncancelable(io);
-    defer state.mutex.unlock(io);
+    // the record is only valid during this callback, so collect owned rkeys to delete
+    var rkey_buf: [64][]const u8 = undefined;
+    var count: usize = 0;
 
     for (uris.array.items) |uri_val| {
+        // hand off a full buffer and keep going; every detached post still gets deleted
+        if (count == rkey_buf.len) {
+            spawnDeletes(state, &rkey_buf);
+            count = 0;
+        }
         if (uri_val != .string) continue;
 
         // check if this detached URI is one of our tracked posts
@@ -353,12 +478,51 @@ fn onDetach(_: []const u8, record: json.Value) void {
 
         if (state.stats.removeByOurRkey(rk)) {
             std.debug.print("post detached, deleting our quote-post {s}\n", .{rk});
-            state.bsky_client.deleteRecord(rk) catch |err| {
-                std.debug.print("failed to delete detached post {s}: {}\n", .{ rk, err });
+            rkey_buf[count] = state.allocator.dupe(u8, rk) catch {
                 state.stats.incErrors();
+                continue;
             };
+            count += 1;
         }
     }
+
+    if (count > 0) spawnDeletes(state, rkey_buf[0..count]);
+}
+
+/// delete our posts on a worker thread so cleanup requests don't stall the firehose.
+/// takes ownership of each rkey string (the slice itself is copied).
+fn spawnDeletes(state: *BotState, rkeys: []const []const u8) void {
+    const owned = state.allocator.dupe([]const u8, rkeys) catch {
+        for (rkeys) |rk| state.allocator.free(rk);
+        state.stats.incErrors();
+        return;
+    };
+
+    const worker = Thread.spawn(.{}, deleteRecords, .{ state, owned }) catch |err| {
+        // deletes honor the original author's wishes, so fall back to doing them inline
+        std.debug.print("failed to spawn delete worker: {}, deleting inline\n", .{err});
+        deleteRecords(state, owned);
+        return;
+    };
+    worker.detach();
+}
+
+fn deleteRecords(state: *BotState, rkeys: []const []const u8) void {
+    const io = app_threaded_io.io();
+    defer {
+        for (rkeys) |rk| state.allocator.free(rk);
+        state.allocator.free(rkeys);
+    }
+
+    state.mutex.lockUncancelable(io);
+    defer state.mutex.unlock(io);
+
+    for (rkeys) |rk| {
+        state.bsky_client.deleteRecord(rk) catch |err| {
+            std.debug.print("failed to delete post {s}: {}\n", .{ rk, err });
+            state.stats.incErrors();
+        };
+    }
 }
 
 fn startupScan(state: *BotState, io_arg: Io) void {
@@ -442,6 +606,8 @@ fn loadBufos(allocator: Allocator, m: *matcher.Matcher, exclude_patterns: []cons
     const results = parsed.value.object.get("results") orelse return;
     if (results != .array) return;
 
+    try m.reserve(results.array.items.len);
+
     var loaded: usize = 0;
     for (results.array.items) |item| {
         if (item != .object) continue;
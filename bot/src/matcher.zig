@@ -2,22 +2,67 @@ const std = @import("std");
 const mem = std.mem;
 const Allocator = mem.Allocator;
 
+// bluesky caps post text at 3000 bytes; anything past this is ignored
+const max_text_len = 4096;
+
+const bufo_prefix = "bufo-";
+const image_extensions = [_][]const u8{ ".gif", ".png", ".jpg", ".jpeg", ".webp" };
+
+// words are bucketed by (length, first letter, last letter); longer words share a length bucket
+const max_shape_len = 16;
+const WordShapes = std.StaticBitSet((max_shape_len + 1) * 26 * 26);
+
+/// bloom-style key for a non-empty word; null if it doesn't start and end with a-z,
+/// which no normalized post word can fail
+fn wordShape(word: []const u8) ?usize {
+    const first = word[0] -% 'a';
+    const last = word[word.len - 1] -% 'a';
+    if (first >= 26 or last >= 26) return null;
+    // explicitly usize: @min with a comptime bound would narrow this to u5 and overflow below
+    const len: usize = @min(word.len, max_shape_len);
+    return (len * 26 + first) * 26 + last;
+}
+
 pub const Bufo = struct {
     name: []const u8,
     url: []const u8,
+    alt_text: []const u8,
     phrase: []const []const u8,
 };
 
 pub const Match = struct {
     name: []const u8,
     url: []const u8,
+    alt_text: []const u8,
 };
 
 pub const Matcher = struct {
     bufos: std.ArrayList(Bufo) = .empty,
+    // every distinct phrase word, interned to a small id; keys are borrowed from bufo phrases
+    vocab: std.StringHashMapUnmanaged(u32) = .empty,
+    // shapes of all vocab words; a post word with an unseen shape can't be in the vocab,
+    // so most words skip the hash lookup entirely
+    word_shapes: WordShapes = WordShapes.initEmpty(),
+    // aho-corasick automaton over word ids, built once by build(). node 0 is the root.
+    nodes: std.ArrayList(Node) = .empty,
+    // root edges as a dense table indexed by word id (0 = no phrase starts with that word).
+    // most post words are read at the root, so this skips a hash lookup on the hot path.
+    first_words: []const u32 = &.{},
+    // bytes in the shortest phrase (words plus single separators); shorter posts can't match
+    min_phrase_bytes: usize = 0,
     allocator: Allocator,
     min_words: u32,
 
+    // id for post words that appear in no phrase; no edge in the automaton carries it
+    const unknown_word = std.math.maxInt(u32);
+
+    const Node = struct {
+        children: std.AutoHashMapUnmanaged(u32, u32) = .empty,
+        fail: u32 = 0,
+        // bufo whose phrase ends here, or at the longest suffix that ends a phrase
+        output: ?u32 = null,
+    };
+
     pub fn init(allocator: Allocator, min_words: u32) Matcher {
         return .{
             .allocator = allocator,
@@ -29,18 +74,31 @@ pub const Matcher = struct {
         for (self.bufos.items) |bufo| {
             self.allocator.free(bufo.name);
             self.allocator.free(bufo.url);
+            self.allocator.free(bufo.alt_text);
             for (bufo.phrase) |word| {
                 self.allocator.free(word);
             }
             self.allocator.free(bufo.phrase);
         }
         self.bufos.deinit(self.allocator);
+        self.vocab.deinit(self.allocator);
+        self.allocator.free(self.first_words);
+        for (self.nodes.items) |*node| {
+            node.children.deinit(self.allocator);
+        }
+        self.nodes.deinit(self.allocator);
+    }
+
+    /// make room for up to n bufos ahead of a bulk load
+    pub fn reserve(self: *Matcher, n: usize) !void {
+        try self.bufos.ensureTotalCapacity(self.allocator, n);
     }
 
     pub fn addBufo(self: *Matcher, name: []const u8, url: []const u8) !void {
         const phrase = try extractPhrase(self.allocator, name);
 
-        if (phrase.len < self.min_words) {
+        // an empty phrase would sit on the root node and match every post
+        if (phrase.len == 0 or phrase.len < self.min_words) {
             for (phrase) |word| self.allocator.free(word);
             self.allocator.free(phrase);
             return;
@@ -49,37 +107,134 @@ pub const Matcher = struct {
         try self.bufos.append(self.allocator, .{
             .name = try self.allocator.dupe(u8, name),
             .url = try self.allocator.dupe(u8, url),
+            .alt_text = try altText(self.allocator, name),
             .phrase = phrase,
         });
     }
 
-    pub fn findMatch(self: *Matcher, text: []const u8) ?Match {
-        var words: std.ArrayList([]const u8) = .empty;
-        defer words.deinit(self.allocator);
+    /// compile all loaded phrases into a single automaton so each post is scanned once.
+    /// must be called after the last addBufo and before findMatch.
+    pub fn build(self: *Matcher) !void {
+        // every phrase word adds at most one node and one vocab entry
+        var total_words: u32 = 0;
+        var min_phrase_bytes: usize = std.math.maxInt(usize);
+        for (self.bufos.items) |bufo| {
+            total_words += @intCast(bufo.phrase.len);
+
+            var phrase_bytes: usize = bufo.phrase.len -| 1;
+            for (bufo.phrase) |word| phrase_bytes += word.len;
+            min_phrase_bytes = @min(min_phrase_bytes, phrase_bytes);
+        }
+        self.min_phrase_bytes = min_phrase_bytes;
+        try self.nodes.ensureTotalCapacity(self.allocator, total_words + 1);
+        try self.vocab.ensureTotalCapacity(self.allocator, total_words);
+
+        try self.nodes.append(self.allocator, .{});
 
-        var i: usize = 0;
-        while (i < text.len) {
-            while (i < text.len and !isAlpha(text[i])) : (i += 1) {}
-            if (i >= text.len) break;
+        // trie over interned word ids; vocab keys are owned by bufos and outlive the automaton
+        for (self.bufos.items, 0..) |bufo, idx| {
+            var state: u32 = 0;
+            for (bufo.phrase) |word| {
+                const interned = try self.vocab.getOrPut(self.allocator, word);
+                if (!interned.found_existing) {
+                    interned.value_ptr.* = self.vocab.count() - 1;
+                    if (wordShape(word)) |shape| self.word_shapes.set(shape);
+                }
+
+                const gop = try self.nodes.items[state].children.getOrPut(self.allocator, interned.value_ptr.*);
+                if (!gop.found_existing) {
+                    gop.value_ptr.* = @intCast(self.nodes.items.len);
+                    try self.nodes.append(self.allocator, .{});
+                }
+                state = gop.value_ptr.*;
+            }
+            // identical phrases share a node, so duplicates cost nothing at match time.
+            // first bufo with a given phrase wins
+            if (self.nodes.items[state].output == null) {
+                self.nodes.items[state].output = @intCast(idx);
+            }
+        }
+
+        const first_words = try self.allocator.alloc(u32, self.vocab.count());
+        @memset(first_words, 0);
+        var root_edges = self.nodes.items[0].children.iterator();
+        while (root_edges.next()) |entry| {
+            first_words[entry.key_ptr.*] = entry.value_ptr.*;
+        }
+        self.first_words = first_words;
 
-            const start = i;
-            while (i < text.len and isAlpha(text[i])) : (i += 1) {}
+        // breadth-first failure links; depth-1 nodes fall back to the root
+        var queue: std.ArrayList(u32) = .empty;
+        defer queue.deinit(self.allocator);
 
-            const word = text[start..i];
-            if (word.len > 0) {
-                words.append(self.allocator, word) catch continue;
+        var roots = self.nodes.items[0].children.valueIterator();
+        while (roots.next()) |child| {
+            try queue.append(self.allocator, child.*);
+        }
+
+        var head: usize = 0;
+        while (head < queue.items.len) : (head += 1) {
+            const state = queue.items[head];
+            var children = self.nodes.items[state].children.iterator();
+            while (children.next()) |entry| {
+                const child = entry.value_ptr.*;
+                const fail = self.step(self.nodes.items[state].fail, entry.key_ptr.*);
+                self.nodes.items[child].fail = fail;
+                if (self.nodes.items[child].output == null) {
+                    self.nodes.items[child].output = self.nodes.items[fail].output;
+                }
+                try queue.append(self.allocator, child);
             }
         }
+    }
 
-        for (self.bufos.items) |bufo| {
-            if (containsPhrase(words.items, bufo.phrase)) {
-                return .{
-                    .name = bufo.name,
-                    .url = bufo.url,
-                };
+    fn step(self: *const Matcher, from: u32, word: u32) u32 {
+        if (word == unknown_word) return 0;
+
+        var state = from;
+        while (state != 0) {
+            if (self.nodes.items[state].children.get(word)) |next| return next;
+            state = self.nodes.items[state].fail;
+        }
+        return self.first_words[word];
+    }
+
+    fn lookupWord(self: *const Matcher, word: []const u8) u32 {
+        const shape = wordShape(word) orelse return unknown_word;
+        if (!self.word_shapes.isSet(shape)) return unknown_word;
+        return self.vocab.get(word) orelse unknown_word;
+    }
+
+    pub fn findMatch(self: *const Matcher, text: []const u8) ?Match {
+        if (self.nodes.items.len == 0) return null;
+        // most posts are short; skip ones that can't hold even the shortest phrase
+        if (text.len < self.min_phrase_bytes) return null;
+
+        // phrase words are lowercase letters; normalize the whole post once so that
+        // splitting on spaces yields words that can be looked up as-is
+        var text_buf: [max_text_len]u8 = undefined;
+        const normalized = normalizeText(&text_buf, text);
+
+        // step the automaton as words are split off; nothing on this path allocates
+        var state: u32 = 0;
+        // longest phrase wins (most specific bufo); ties go to the earliest in the post
+        var best: ?u32 = null;
+        var tokens = mem.tokenizeScalar(u8, normalized, ' ');
+        while (tokens.next()) |word| {
+            state = self.step(state, self.lookupWord(word));
+            if (self.nodes.items[state].output) |idx| {
+                if (best == null or self.bufos.items[idx].phrase.len > self.bufos.items[best.?].phrase.len) {
+                    best = idx;
+                }
             }
         }
-        return null;
+
+        const bufo = self.bufos.items[best orelse return null];
+        return .{
+            .name = bufo.name,
+            .url = bufo.url,
+            .alt_text = bufo.alt_text,
+        };
     }
 
     pub fn count(self: *Matcher) usize {
@@ -87,22 +242,25 @@ pub const Matcher = struct {
     }
 };
 
+/// image alt text: the name without its extension, dashes to spaces
+fn altText(allocator: Allocator, name: []const u8) ![]const u8 {
+    const stem = name[0 .. mem.indexOfScalar(u8, name, '.') orelse name.len];
+    const alt = try allocator.dupe(u8, stem);
+    mem.replaceScalar(u8, alt, '-', ' ');
+    return alt;
+}
+
 fn extractPhrase(allocator: Allocator, name: []const u8) ![]const []const u8 {
     var start: usize = 0;
-    if (mem.startsWith(u8, name, "bufo-")) {
-        start = 5;
+    if (mem.startsWith(u8, name, bufo_prefix)) {
+        start = bufo_prefix.len;
     }
     var end = name.len;
-    if (mem.endsWith(u8, name, ".gif")) {
-        end -= 4;
-    } else if (mem.endsWith(u8, name, ".png")) {
-        end -= 4;
-    } else if (mem.endsWith(u8, name, ".jpg")) {
-        end -= 4;
-    } else if (mem.endsWith(u8, name, ".jpeg")) {
-        end -= 5;
-    } else if (mem.endsWith(u8, name, ".webp")) {
-        end -= 5;
+    for (image_extensions) |ext| {
+        if (mem.endsWith(u8, name, ext)) {
+            end -= ext.len;
+            break;
+        }
     }
 
     const slug = name[start..end];
@@ -117,38 +275,88 @@ fn extractPhrase(allocator: Allocator, name: []const u8) ![]const []const u8 {
     while (iter.next()) |word| {
         if (word.len > 0) {
             const lower = try allocator.alloc(u8, word.len);
-            for (word, 0..) |c, j| {
-                lower[j] = std.ascii.toLower(c);
-            }
-            try words.append(allocator, lower);
+            try words.append(allocator, std.ascii.lowerString(lower, word));
         }
     }
 
     return try words.toOwnedSlice(allocator);
 }
 
-fn containsPhrase(post_words: []const []const u8, phrase: []const []const u8) bool {
-    if (phrase.len == 0 or post_words.len < phrase.len) return false;
+// ascii letters fold to lowercase; every other byte (including utf-8 sequences) separates words
+const translate_table: [256]u8 = blk: {
+    var table: [256]u8 = undefined;
+    for (&table, 0..) |*entry, i| {
+        const c: u8 = @intCast(i);
+        entry.* = if (std.ascii.isAlphabetic(c)) std.ascii.toLower(c) else ' ';
+    }
+    break :blk table;
+};
+
+/// translate src into dst a vector at a time, truncating to dst.len.
+/// equivalent to mapping each byte through translate_table.
+fn normalizeText(dst: []u8, src: []const u8) []u8 {
+    const lanes = std.simd.suggestVectorLength(u8) orelse 16;
+    const V = @Vector(lanes, u8);
+    const upper_a: V = @splat('A');
+    const lower_a: V = @splat('a');
+    const alphabet_len: V = @splat(26);
+    const case_bit: V = @splat(0x20);
+    const spaces: V = @splat(' ');
 
-    outer: for (0..post_words.len - phrase.len + 1) |i| {
-        for (phrase, 0..) |phrase_word, j| {
-            if (!eqlIgnoreCase(post_words[i + j], phrase_word)) {
-                continue :outer;
-            }
-        }
-        return true;
+    const len = @min(dst.len, src.len);
+    var i: usize = 0;
+    while (i + lanes <= len) : (i += lanes) {
+        const chunk: V = src[i..][0..lanes].*;
+        // c - 'A' wraps around for anything below 'A', so one compare covers 'A'...'Z'
+        const is_upper = (chunk -% upper_a) < alphabet_len;
+        const folded = @select(u8, is_upper, chunk | case_bit, chunk);
+        const is_letter = (folded -% lower_a) < alphabet_len;
+        dst[i..][0..lanes].* = @select(u8, is_letter, folded, spaces);
+    }
+    while (i < len) : (i += 1) {
+        dst[i] = translate_table[src[i]];
     }
-    return false;
+    return dst[0..len];
 }
 
-fn eqlIgnoreCase(a: []const u8, b: []const u8) bool {
-    if (a.len != b.len) return false;
-    for (a, b) |ca, cb| {
-        if (std.ascii.toLower(ca) != std.ascii.toLower(cb)) return false;
-    }
-    return true;
+test "findMatch prefers the longest phrase, then the earliest" {
+    var m = Matcher.init(std.testing.allocator, 2);
+    defer m.deinit();
+
+    try m.addBufo("bufo-is-happy.png", "https://all-the.bufo.zone/bufo-is-happy.png");
+    try m.addBufo("bufo-is-very-happy.gif", "https://all-the.bufo.zone/bufo-is-very-happy.gif");
+    try m.addBufo("happy-birthday.png", "https://all-the.bufo.zone/happy-birthday.png");
+    try m.addBufo("bufo-ok.png", "https://all-the.bufo.zone/bufo-ok.png");
+    try m.build();
+
+    // one-word phrases are below min_words
+    try std.testing.expectEqual(@as(usize, 3), m.count());
+
+    const longest = m.findMatch("so it IS VERY happy!") orelse return error.TestExpectedMatch;
+    try std.testing.expectEqualStrings("bufo-is-very-happy.gif", longest.name);
+    try std.testing.expectEqualStrings("bufo is very happy", longest.alt_text);
+
+    const earliest = m.findMatch("it is happy birthday") orelse return error.TestExpectedMatch;
+    try std.testing.expectEqualStrings("bufo-is-happy.png", earliest.name);
+
+    const punctuated = m.findMatch("#happy-birthday to you") orelse return error.TestExpectedMatch;
+    try std.testing.expectEqualStrings("happy-birthday.png", punctuated.name);
+
+    try std.testing.expectEqual(@as(?Match, null), m.findMatch("this is not happy"));
+    try std.testing.expectEqual(@as(?Match, null), m.findMatch("ok"));
 }
 
-fn isAlpha(c: u8) bool {
-    return (c >= 'a' and c <= 'z') or (c >= 'A' and c <= 'Z');
+test "empty phrases never match" {
+    var m = Matcher.init(std.testing.allocator, 0);
+    defer m.deinit();
+
+    try m.addBufo("bufo-.gif", "https://all-the.bufo.zone/bufo-.gif");
+    try m.addBufo("bufo-hello.png", "https://all-the.bufo.zone/bufo-hello.png");
+    try m.build();
+
+    try std.testing.expectEqual(@as(usize, 1), m.count());
+    try std.testing.expectEqual(@as(?Match, null), m.findMatch("good morning world"));
+
+    const match = m.findMatch("well hello there") orelse return error.TestExpectedMatch;
+    try std.testing.expectEqualStrings("bufo-hello.png", match.name);
 }
@@ -47,6 +47,8 @@ pub const Stats = struct {
 
     // track per-bufo match counts: name -> {count, url}
     bufo_matches: std.StringHashMap(BufoMatchData),
+    // sum of all bufo_matches counts, kept alongside so cooldowns don't re-sum the map
+    total_bufo_matches: u64 = 0,
     bufo_mutex: Io.Mutex = Io.Mutex.init,
     // track last post time per bufo (persisted to survive restarts)
     last_posted: std.StringHashMap(i64),
@@ -171,6 +173,11 @@ pub const Stats = struct {
             }
         }
 
+        var matches_iter = self.bufo_matches.valueIterator();
+        while (matches_iter.next()) |data| {
+            self.total_bufo_matches += data.count;
+        }
+
         // load last_posted timestamps
         if (root.get("last_posted")) |lp| {
             if (lp == .object) {
@@ -250,6 +257,7 @@ pub const Stats = struct {
 
         if (self.bufo_matches.getPtr(bufo_name)) |data| {
             data.count += 1;
+            self.total_bufo_matches += 1;
         } else {
             const key = self.allocator.dupe(u8, bufo_name) catch return;
             const url = self.allocator.dupe(u8, bufo_url) catch {
@@ -259,9 +267,12 @@ pub const Stats = struct {
             self.bufo_matches.put(key, .{ .count = 1, .url = url }) catch {
                 self.allocator.free(key);
                 self.allocator.free(url);
+                return;
             };
+            self.total_bufo_matches += 1;
         }
-        self.saveUnlocked();
+        // matches are frequent and only feed the stats page, so they are flushed in
+        // batches by the save ticker rather than rewriting stats.json on every match
     }
 
     pub fn incPostsCreated(self: *Stats) void {
@@ -345,11 +356,7 @@ pub const Stats = struct {
 
         const bufo_count: u64 = if (self.bufo_matches.get(bufo_name)) |data| data.count else 0;
 
-        var total_count: u64 = 0;
-        var iter = self.bufo_matches.iterator();
-        while (iter.next()) |entry| {
-            total_count += entry.value_ptr.count;
-        }
+        const total_count = self.total_bufo_matches;
         if (total_count == 0) return base_secs;
 
         const ratio = @as(f64, @floatFromInt(bufo_count)) / @as(f64, @floatFromInt(total_count));
@@ -26,6 +26,11 @@ from dotenv import load_dotenv
 
 load_dotenv(Path(__file__).parent.parent / ".env")
 
+# keep in sync with ingest_bufos.py so single additions embed the same way
+MAX_IMAGE_SIZE = (384, 384)
+RAW_IMAGE_MAX_BYTES = 30_000
+RAW_IMAGE_FORMATS = {"PNG", "JPEG", "WEBP"}
+
 
 async def embed_image(client: httpx.AsyncClient, image_path: Path, api_key: str) -> list[float] | None:
     """Generate embedding for an image using Voyage AI"""
@@ -43,15 +48,32 @@ async def embed_image(client: httpx.AsyncClient, image_path: Path, api_key: str)
             for frame_idx in frame_indices:
                 image.seek(frame_idx)
                 buffered = BytesIO()
-                image.convert("RGB").save(buffered, format="WEBP", lossless=True)
+                frame = image.convert("RGB")
+                frame.thumbnail(MAX_IMAGE_SIZE, Image.Resampling.LANCZOS)
+                frame.save(buffered, format="WEBP", quality=80, method=6)
                 img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
                 content.append({
                     "type": "image_base64",
                     "image_base64": f"data:image/webp;base64,{img_base64}",
                 })
+        elif (
+            image.format in RAW_IMAGE_FORMATS
+            and image.mode == "RGB"
+            and image.width <= MAX_IMAGE_SIZE[0]
+            and image.height <= MAX_IMAGE_SIZE[1]
+            and image_path.stat().st_size < RAW_IMAGE_MAX_BYTES
+        ):
+            # small RGB images are sent as-is, exactly as ingest_bufos.py does
+            img_base64 = base64.b64encode(image_path.read_bytes()).decode("ascii")
+            content.append({
+                "type": "image_base64",
+                "image_base64": f"data:{Image.MIME[image.format]};base64,{img_base64}",
+            })
         else:
             buffered = BytesIO()
-            image.convert("RGB").save(buffered, format="WEBP", lossless=True)
+            frame = image.convert("RGB")
+            frame.thumbnail(MAX_IMAGE_SIZE, Image.Resampling.LANCZOS)
+            frame.save(buffered, format="WEBP", quality=80, method=6)
             img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
             content.append({
                 "type": "image_base64",
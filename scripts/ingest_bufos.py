@@ -2,11 +2,13 @@
 # /// script
 # requires-python = ">=3.11"
 # dependencies = [
-#     "httpx",
-#     "beautifulsoup4",
+#     "httpx[http2]",
 #     "rich",
 #     "python-dotenv",
 #     "pillow",
+#     "orjson",
+#     "numpy",
+#     "pybase64",
 # ]
 # ///
 """
@@ -14,17 +16,21 @@ Scrape all bufos from bufo.zone, generate embeddings, and upload to turbopuffer.
 """
 
 import asyncio
-import base64
 import hashlib
 import os
+import random
 import re
+import shutil
+from concurrent.futures import Executor, ProcessPoolExecutor
 from io import BytesIO
 from pathlib import Path
 from typing import List
 
 import httpx
-from bs4 import BeautifulSoup
-from PIL import Image
+import numpy as np
+import orjson
+import pybase64
+from PIL import Image, ImageSequence
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from dotenv import load_dotenv
@@ -34,34 +40,74 @@ console = Console()
 # Load .env from project root
 load_dotenv(Path(__file__).parent.parent / ".env")
 
+# bump whenever encoding settings change so stale cached payloads are ignored
+ENCODE_CACHE_VERSION = 5
 
-async def fetch_bufo_urls() -> set[str]:
-    """Fetch all unique bufo URLs from bufo.zone"""
-    console.print("[cyan]fetching bufo list from bufo.zone...[/cyan]")
+# voyage resizes inputs to a small grid anyway; shrinking first saves encode time and upload bytes
+MAX_IMAGE_SIZE = (384, 384)
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get("https://bufo.zone", timeout=30.0)
-        response.raise_for_status()
+# lossy WEBP: voyage downsamples its inputs anyway, and lossless payloads are several times
+# larger to serialize and upload. method=6 trades encode cpu for the smallest output
+WEBP_SAVE_OPTIONS = {"format": "WEBP", "quality": 80, "method": 6}
 
-    soup = BeautifulSoup(response.text, "html.parser")
+# static images already this small in a format voyage accepts are sent as-is; re-encoding
+# them would barely shrink the payload. only plain RGB images within MAX_IMAGE_SIZE qualify,
+# so nothing is skipped but the lossy WEBP step: no mode conversion, no downscaling.
+# add_one_bufo.py applies the same rule
+RAW_IMAGE_MAX_BYTES = 30_000
+RAW_IMAGE_FORMATS = {"PNG", "JPEG", "WEBP"}
 
-    urls = set()
-    for img in soup.find_all("img"):
-        src = img.get("src", "")
-        if "all-the.bufo.zone" in src:
-            urls.add(src)
+# voyage-multimodal-3 output size
+EMBEDDING_DIM = 1024
 
-    pattern = re.compile(
-        r"https://all-the\.bufo\.zone/[^\"'>\s]+\.(png|gif|jpg|jpeg|webp)"
-    )
-    for match in pattern.finditer(response.text):
-        urls.add(match.group(0))
+# embedding components are sent rounded to this many decimals: about float16 precision for
+# unit-norm 1024-dim vectors, and far fewer digits on the wire than a full float repr
+VECTOR_DECIMALS = 5
+
+# every bufo image on the page is an absolute all-the.bufo.zone url, in an <img> src or elsewhere
+BUFO_URL_PATTERN = re.compile(
+    r"https://all-the\.bufo\.zone/[^\"'>\s]+\.(?:png|gif|jpg|jpeg|webp)"
+)
+
+
+async def fetch_bufo_urls(client: httpx.AsyncClient) -> set[str]:
+    """Fetch all unique bufo URLs from bufo.zone"""
+    console.print("[cyan]fetching bufo list from bufo.zone...[/cyan]")
+
+    response = await client.get("https://bufo.zone", timeout=30.0)
+    response.raise_for_status()
+
+    # a single regex pass over the raw html; building a dom just to read img srcs is much slower
+    urls = {match.group(0) for match in BUFO_URL_PATTERN.finditer(response.text)}
 
     console.print(f"[green]found {len(urls)} unique bufo images[/green]")
     return urls
 
 
-async def download_bufo(client: httpx.AsyncClient, url: str, output_dir: Path) -> str | None:
+def retry_delay(response: httpx.Response | None, attempt: int) -> float:
+    """Seconds to wait before retry number attempt + 1.
+
+    Honors a numeric Retry-After header, otherwise backs off exponentially (2s, 4s, 8s).
+    Up to a second of jitter keeps concurrent failures from retrying in lockstep.
+    """
+    delay = (2 ** attempt) * 2
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            delay = int(retry_after)
+    return delay + random.uniform(0, 1)
+
+
+def is_retryable(e: Exception) -> bool:
+    """Rate limits, server errors and dropped connections are worth another try"""
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code == 429 or e.response.status_code >= 500
+    return isinstance(e, httpx.TransportError)
+
+
+async def download_bufo(
+    client: httpx.AsyncClient, url: str, output_dir: Path, max_retries: int = 3
+) -> str | None:
     """Download a single bufo and return filename"""
     filename = url.split("/")[-1]
     output_path = output_dir / filename
@@ -69,172 +115,346 @@ async def download_bufo(client: httpx.AsyncClient, url: str, output_dir: Path) -
     if output_path.exists() and output_path.stat().st_size > 0:
         return filename
 
-    try:
-        response = await client.get(url, timeout=30.0)
-        response.raise_for_status()
-        output_path.write_bytes(response.content)
-        return filename
-    except Exception as e:
-        console.print(f"[red]error downloading {url}: {e}[/red]")
-        return None
+    # stream to a temp file so only a small window of each image is held in memory, and an
+    # interrupted download never leaves a partial file that later runs would treat as done
+    tmp_path = output_path.with_name(f"{filename}.part")
+    for attempt in range(max_retries):
+        try:
+            async with client.stream("GET", url, timeout=30.0) as response:
+                response.raise_for_status()
+                with tmp_path.open("wb") as f:
+                    async for chunk in response.aiter_bytes(chunk_size=65536):
+                        f.write(chunk)
+            tmp_path.replace(output_path)
+            return filename
+        except Exception as e:
+            tmp_path.unlink(missing_ok=True)
+            if is_retryable(e) and attempt < max_retries - 1:
+                response = e.response if isinstance(e, httpx.HTTPStatusError) else None
+                await asyncio.sleep(retry_delay(response, attempt))
+                continue
+            console.print(f"[red]error downloading {url}: {e}[/red]")
+            return None
+    return None
 
 
-async def download_all_bufos(urls: set[str], output_dir: Path) -> List[Path]:
+async def download_all_bufos(
+    client: httpx.AsyncClient, urls: set[str], output_dir: Path, max_concurrency: int = 20
+) -> List[Path]:
     """Download all bufos concurrently"""
     output_dir.mkdir(parents=True, exist_ok=True)
 
     downloaded_files = []
 
-    async with httpx.AsyncClient() as client:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-        ) as progress:
-            task = progress.add_task(
-                f"[cyan]downloading {len(urls)} bufos...", total=len(urls)
-            )
-
-            batch_size = 10
-            urls_list = list(urls)
+    # keep a fixed number of downloads in flight rather than waiting on the slowest of each batch
+    semaphore = asyncio.Semaphore(max_concurrency)
 
-            for i in range(0, len(urls_list), batch_size):
-                batch = urls_list[i : i + batch_size]
-                tasks = [download_bufo(client, url, output_dir) for url in batch]
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+    ) as progress:
+        task = progress.add_task(
+            f"[cyan]downloading {len(urls)} bufos...", total=len(urls)
+        )
 
-                for filename in results:
-                    if filename and not isinstance(filename, Exception):
-                        downloaded_files.append(output_dir / filename)
+        async def download_with_semaphore(url):
+            async with semaphore:
+                filename = await download_bufo(client, url, output_dir)
+            progress.update(task, advance=1)
+            return filename
 
-                progress.update(task, advance=len(batch))
+        results = await asyncio.gather(
+            *(download_with_semaphore(url) for url in urls), return_exceptions=True
+        )
 
-                if i + batch_size < len(urls_list):
-                    await asyncio.sleep(0.5)
+        for filename in results:
+            if filename and not isinstance(filename, Exception):
+                downloaded_files.append(output_dir / filename)
 
     console.print(f"[green]downloaded {len(downloaded_files)} bufos[/green]")
     return downloaded_files
 
 
-async def embed_image(client: httpx.AsyncClient, image_path: Path, api_key: str, max_retries: int = 3) -> List[float] | None:
-    """Generate embedding for an image using Voyage AI with retry logic"""
+def encode_frame(frame: Image.Image, buffered: BytesIO) -> str:
+    """Downscale one frame and encode it as a base64 WEBP data URI, reusing buffered"""
+    buffered.seek(0)
+    buffered.truncate()
+    frame = frame.convert("RGB")
+    frame.thumbnail(MAX_IMAGE_SIZE, Image.Resampling.LANCZOS)
+    frame.save(buffered, **WEBP_SAVE_OPTIONS)
+    # simd base64; the output is plain ascii, so skip the utf-8 decoder
+    img_base64 = pybase64.b64encode(buffered.getvalue()).decode("ascii")
+    return f"data:image/webp;base64,{img_base64}"
+
+
+def encode_image_frames(image_path: Path) -> list[str]:
+    """Encode one bufo as a list of base64 image data URIs (several keyframes if animated)"""
+    image = Image.open(image_path)
+
+    # check if this is an animated image
+    is_animated = hasattr(image, 'n_frames') and image.n_frames > 1
+
+    if (
+        not is_animated
+        and image.format in RAW_IMAGE_FORMATS
+        and image.mode == "RGB"
+        and image.width <= MAX_IMAGE_SIZE[0]
+        and image.height <= MAX_IMAGE_SIZE[1]
+        and image_path.stat().st_size < RAW_IMAGE_MAX_BYTES
+    ):
+        # Image.open only read the header, so this path never decodes any pixels
+        img_base64 = pybase64.b64encode(image_path.read_bytes()).decode("ascii")
+        return [f"data:{Image.MIME[image.format]};base64,{img_base64}"]
+
+    frames = []
+    # one buffer for every frame of this image
+    buffered = BytesIO()
+
+    if is_animated:
+        # for animated GIFs, extract multiple keyframes for temporal representation
+        num_frames = image.n_frames
+        # extract up to 5 evenly distributed frames
+        max_frames = min(5, num_frames)
+        frame_indices = [int(i * (num_frames - 1) / (max_frames - 1)) for i in range(max_frames)]
+
+        # decode frames in one forward pass, keeping only the ones we want
+        wanted = set(frame_indices)
+        for frame_idx, frame in enumerate(ImageSequence.Iterator(image)):
+            if frame_idx in wanted:
+                frames.append(encode_frame(frame, buffered))
+    else:
+        frames.append(encode_frame(image, buffered))
+
+    return frames
+
+
+def prune_encode_cache(cache_dir: Path):
+    """Remove cached payloads from older ENCODE_CACHE_VERSIONs; they are never read again"""
+    if not cache_dir.exists():
+        return
+    current = f"v{ENCODE_CACHE_VERSION}"
+    for version_dir in cache_dir.iterdir():
+        if version_dir.is_dir() and version_dir.name != current:
+            shutil.rmtree(version_dir)
+
+
+def encode_image_content(image_path: Path, cache_dir: Path | None = None) -> list[dict]:
+    """Build the Voyage content array (filename text + image frames) for one bufo.
+
+    Encoded frames are cached under cache_dir by a hash of the file contents, so
+    re-runs skip decoding and re-encoding images that haven't changed.
+    """
+    frames = None
+    cache_path = None
+    if cache_dir is not None:
+        file_hash = hashlib.blake2b(image_path.read_bytes(), digest_size=16).hexdigest()
+        cache_path = cache_dir / f"v{ENCODE_CACHE_VERSION}" / f"{file_hash}.json"
+        if cache_path.exists():
+            frames = orjson.loads(cache_path.read_bytes())
+
+    if frames is None:
+        frames = encode_image_frames(image_path)
+        if cache_path is not None:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            # write then rename so a concurrent reader never sees a partial file
+            tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(orjson.dumps(frames))
+            tmp_path.replace(cache_path)
+
+    # extract semantic meaning from filename for early fusion
+    # convert "bufo-jumping-on-bed.png" -> "bufo jumping on bed"
+    filename_text = image_path.stem.replace("-", " ").replace("_", " ")
+
+    # start content array with filename text for early fusion, then each image frame
+    content = [{
+        "type": "text",
+        "text": filename_text
+    }]
+    for frame in frames:
+        content.append({
+            "type": "image_base64",
+            "image_base64": frame,
+        })
+
+    return content
+
+
+def describe_error(e: BaseException) -> str:
+    """Error suffix for log lines, with the response body for 400s"""
+    if isinstance(e, httpx.HTTPStatusError):
+        # show actual error response for 400s
+        detail = e.response.text if e.response.status_code == 400 else str(e)
+        return f" ({e.response.status_code}): {detail}"
+    return f": {e}"
+
+
+async def request_embeddings(
+    client: httpx.AsyncClient, inputs: List[dict], api_key: str, max_retries: int = 3
+) -> List[List[float]]:
+    """Embed encoded inputs in one Voyage AI request, retrying transient failures.
+
+    Returns one embedding per input, in input order. Raises on any other failure.
+    """
     for attempt in range(max_retries):
         try:
-            image = Image.open(image_path)
-
-            # check if this is an animated image
-            is_animated = hasattr(image, 'n_frames') and image.n_frames > 1
-
-            # extract semantic meaning from filename for early fusion
-            # convert "bufo-jumping-on-bed.png" -> "bufo jumping on bed"
-            filename_text = image_path.stem.replace("-", " ").replace("_", " ")
-
-            # start content array with filename text for early fusion
-            content = [{
-                "type": "text",
-                "text": filename_text
-            }]
-
-            if is_animated:
-                # for animated GIFs, extract multiple keyframes for temporal representation
-                num_frames = image.n_frames
-                # extract up to 5 evenly distributed frames
-                max_frames = min(5, num_frames)
-                frame_indices = [int(i * (num_frames - 1) / (max_frames - 1)) for i in range(max_frames)]
-
-                # add each frame to content array
-                for frame_idx in frame_indices:
-                    image.seek(frame_idx)
-                    buffered = BytesIO()
-                    image.convert("RGB").save(buffered, format="WEBP", lossless=True)
-                    img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
-                    content.append({
-                        "type": "image_base64",
-                        "image_base64": f"data:image/webp;base64,{img_base64}",
-                    })
-            else:
-                # for static images, add single image to content array
-                buffered = BytesIO()
-                image.convert("RGB").save(buffered, format="WEBP", lossless=True)
-                img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
-                content.append({
-                    "type": "image_base64",
-                    "image_base64": f"data:image/webp;base64,{img_base64}",
-                })
-
             response = await client.post(
                 "https://api.voyageai.com/v1/multimodalembeddings",
                 headers={
                     "Authorization": f"Bearer {api_key}",
                     "Content-Type": "application/json",
                 },
-                json={
-                    "inputs": [{"content": content}],
+                # orjson is much faster than stdlib json on these large base64 bodies
+                content=orjson.dumps({
+                    "inputs": inputs,
                     "model": "voyage-multimodal-3",
                     "input_type": "document",
-                },
+                }),
                 timeout=60.0,
             )
             response.raise_for_status()
-            result = response.json()
-            return result["data"][0]["embedding"]
-        except httpx.HTTPStatusError as e:
-            if e.response.status_code == 429:
-                # rate limited - exponential backoff
-                wait_time = (2 ** attempt) * 2  # 2s, 4s, 8s
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(wait_time)
-                    continue
-            # show actual error response for 400s
-            error_detail = e.response.text if e.response.status_code == 400 else str(e)
-            console.print(f"[red]error embedding {image_path.name} ({e.response.status_code}): {error_detail}[/red]")
-            return None
+            # the body is mostly float text; orjson parses it several times faster than json.loads
+            result = orjson.loads(response.content)
+            # results come back in input order; "index" is authoritative if present
+            embeddings = [None] * len(inputs)
+            for j, item in enumerate(result["data"]):
+                embeddings[item.get("index", j)] = item["embedding"]
+            return embeddings
         except Exception as e:
-            console.print(f"[red]error embedding {image_path.name}: {e}[/red]")
-            return None
-    return None
+            # rate limits, server errors and dropped connections: back off and try again
+            if is_retryable(e) and attempt < max_retries - 1:
+                response = e.response if isinstance(e, httpx.HTTPStatusError) else None
+                await asyncio.sleep(retry_delay(response, attempt))
+                continue
+            raise
+
+
+async def embed_batch(
+    client: httpx.AsyncClient,
+    image_paths: List[Path],
+    api_key: str,
+    executor: Executor | None = None,
+    cache_dir: Path | None = None,
+    max_retries: int = 3,
+) -> List[List[float] | None]:
+    """Generate embeddings for a batch of images in one Voyage AI request, with retry logic.
+
+    If the batch request is rejected outright (not a transient failure), each image is sent
+    on its own. Returns one entry per input path, None where the image could not be embedded.
+    """
+    embeddings: List[List[float] | None] = [None] * len(image_paths)
+
+    # decoding + WEBP encoding is CPU-bound; run it off the event loop so uploads keep flowing
+    loop = asyncio.get_running_loop()
+    encoded = await asyncio.gather(
+        *(
+            loop.run_in_executor(executor, encode_image_content, path, cache_dir)
+            for path in image_paths
+        ),
+        return_exceptions=True,
+    )
+
+    # encode up front so one unreadable image doesn't sink the whole batch
+    inputs = []
+    positions = []
+    for i, (image_path, content) in enumerate(zip(image_paths, encoded)):
+        if isinstance(content, BaseException):
+            console.print(f"[red]error encoding {image_path.name}: {content}[/red]")
+            continue
+        inputs.append({"content": content})
+        positions.append(i)
+
+    if not inputs:
+        return embeddings
+
+    batch_names = ", ".join(image_paths[i].name for i in positions)
+
+    try:
+        results = await request_embeddings(client, inputs, api_key, max_retries)
+    except Exception as e:
+        console.print(f"[red]error embedding [{batch_names}]{describe_error(e)}[/red]")
+        # transient failures already used up their retries; splitting the batch won't help
+        if is_retryable(e) or len(inputs) == 1:
+            return embeddings
+
+        # one rejected image (e.g. too large) fails the whole request; send each image on
+        # its own so only that one is lost
+        console.print(f"[yellow]retrying [{batch_names}] one image at a time[/yellow]")
+        singles = await asyncio.gather(
+            *(request_embeddings(client, [item], api_key, max_retries) for item in inputs),
+            return_exceptions=True,
+        )
+        results = []
+        for i, single in zip(positions, singles):
+            if isinstance(single, BaseException):
+                console.print(f"[red]error embedding {image_paths[i].name}{describe_error(single)}[/red]")
+                results.append(None)
+            else:
+                results.append(single[0])
+
+    for i, embedding in zip(positions, results):
+        embeddings[i] = embedding
+    return embeddings
 
 
 async def generate_embeddings(
-    image_paths: List[Path], api_key: str
-) -> dict[str, List[float]]:
-    """Generate embeddings for all images with controlled concurrency"""
-    embeddings = {}
+    client: httpx.AsyncClient,
+    image_paths: List[Path],
+    api_key: str,
+    cache_dir: Path | None = None,
+    batch_size: int = 8,
+) -> tuple[List[str], np.ndarray]:
+    """Generate embeddings for all images in batches with controlled concurrency.
+
+    Returns the filenames that were embedded and a float32 array with one row per filename.
+    """
+    # the same filename can be linked from more than one place on the page
+    image_paths = list(dict.fromkeys(image_paths))
 
-    # limit to 50 concurrent requests to stay well under 2000/min rate limit
-    semaphore = asyncio.Semaphore(50)
+    # one contiguous float32 block instead of a python list of boxed floats per image
+    names: List[str] = []
+    vectors = np.empty((len(image_paths), EMBEDDING_DIM), dtype=np.float32)
 
-    async def embed_with_semaphore(client, image_path):
+    # limit to ~50 images in flight to stay well under 2000/min rate limit
+    semaphore = asyncio.Semaphore(max(1, 50 // batch_size))
+
+    async def embed_with_semaphore(batch):
         async with semaphore:
-            embedding = await embed_image(client, image_path, api_key)
-            return (image_path.name, embedding)
-
-    async with httpx.AsyncClient() as client:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-        ) as progress:
-            task = progress.add_task(
-                f"[cyan]generating embeddings for {len(image_paths)} images...",
-                total=len(image_paths),
-            )
+            batch_embeddings = await embed_batch(client, batch, api_key, executor, cache_dir)
+            return [(path.name, embedding) for path, embedding in zip(batch, batch_embeddings)]
+
+    # image encoding runs in worker processes to use every core without GIL contention
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor, Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+    ) as progress:
+        task = progress.add_task(
+            f"[cyan]generating embeddings for {len(image_paths)} images...",
+            total=len(image_paths),
+        )
 
-            # process all images concurrently with semaphore
-            tasks = [embed_with_semaphore(client, img) for img in image_paths]
-            results = await asyncio.gather(*tasks)
+        # process all batches concurrently with semaphore
+        batches = [image_paths[i : i + batch_size] for i in range(0, len(image_paths), batch_size)]
+        tasks = [embed_with_semaphore(batch) for batch in batches]
 
-            for name, embedding in results:
+        # collect batches as they finish so progress tracks real completions
+        for next_batch in asyncio.as_completed(tasks):
+            batch_results = await next_batch
+            for name, embedding in batch_results:
                 if embedding:
-                    embeddings[name] = embedding
-                progress.update(task, advance=1)
+                    vectors[len(names)] = embedding
+                    names.append(name)
+            progress.update(task, advance=len(batch_results))
 
-    console.print(f"[green]generated {len(embeddings)} embeddings[/green]")
-    return embeddings
+    console.print(f"[green]generated {len(names)} embeddings[/green]")
+    return names, vectors[: len(names)]
 
 
 async def upload_to_turbopuffer(
-    embeddings: dict[str, List[float]],
+    client: httpx.AsyncClient,
+    filenames: List[str],
+    embeddings: np.ndarray,
     bufo_urls: dict[str, str],
     api_key: str,
     namespace: str,
@@ -242,54 +462,62 @@ async def upload_to_turbopuffer(
     """Upload embeddings to turbopuffer"""
     console.print("[cyan]uploading to turbopuffer...[/cyan]")
 
-    ids = []
-    vectors = []
-    urls = []
-    names = []
-    filenames = []
-
-    for filename, embedding in embeddings.items():
-        # use hash as ID to stay under 64 byte limit
-        file_hash = hashlib.sha256(filename.encode()).hexdigest()[:16]
-        ids.append(file_hash)
-        vectors.append(embedding)
-        urls.append(bufo_urls.get(filename, ""))
-        names.append(filename.rsplit(".", 1)[0])
-        filenames.append(filename)
-
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            f"https://api.turbopuffer.com/v1/vectors/{namespace}",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
+    # build each column in one pass instead of growing five lists row by row
+    # use hash as ID to stay under 64 byte limit; add_one_bufo.py uses the same scheme,
+    # so changing it would orphan every existing row
+    ids = [hashlib.sha256(filename.encode()).hexdigest()[:16] for filename in filenames]
+    vectors = np.round(embeddings, VECTOR_DECIMALS)
+    urls = [bufo_urls.get(filename, "") for filename in filenames]
+    names = [filename.rsplit(".", 1)[0] for filename in filenames]
+
+    # shard the upsert so no single request has to serialize (or time out on) every vector
+    chunk_size = 500
+    semaphore = asyncio.Semaphore(8)
+
+    async def upload_chunk(start: int, include_schema: bool):
+        end = start + chunk_size
+        payload = {
+            "ids": ids[start:end],
+            "vectors": vectors[start:end],
+            "distance_metric": "cosine_distance",
+            "attributes": {
+                "url": urls[start:end],
+                "name": names[start:end],
+                "filename": filenames[start:end],
             },
-            json={
-                "ids": ids,
-                "vectors": vectors,
-                "distance_metric": "cosine_distance",
-                "attributes": {
-                    "url": urls,
-                    "name": names,
-                    "filename": filenames,
+        }
+        if include_schema:
+            payload["schema"] = {
+                "name": {
+                    "type": "string",
+                    "full_text_search": True,
                 },
-                "schema": {
-                    "name": {
-                        "type": "string",
-                        "full_text_search": True,
-                    },
-                    "filename": {
-                        "type": "string",
-                        "full_text_search": True,
-                    },
+                "filename": {
+                    "type": "string",
+                    "full_text_search": True,
                 },
-            },
-            timeout=120.0,
-        )
+            }
+        async with semaphore:
+            response = await client.post(
+                f"https://api.turbopuffer.com/v1/vectors/{namespace}",
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json",
+                },
+                # stdlib json formats every float through repr; orjson is an order of magnitude faster
+                content=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+                timeout=120.0,
+            )
         if response.status_code != 200:
             console.print(f"[red]turbopuffer error: {response.text}[/red]")
             response.raise_for_status()
 
+    starts = range(0, len(ids), chunk_size)
+    if starts:
+        # the first chunk carries the schema and lands before the rest so they all see it
+        await upload_chunk(starts[0], include_schema=True)
+        await asyncio.gather(*(upload_chunk(start, include_schema=False) for start in starts[1:]))
+
     console.print(
         f"[green]uploaded {len(ids)} bufos to turbopuffer namespace '{namespace}'[/green]"
     )
@@ -314,16 +542,28 @@ async def main():
     script_dir = Path(__file__).parent
     project_root = script_dir.parent
     output_dir = project_root / "data" / "bufos"
+    encoded_dir = project_root / "data" / "encoded"
+    prune_encode_cache(encoded_dir)
 
-    bufo_urls_raw = await fetch_bufo_urls()
+    # one pooled client for every stage so connections (and TLS sessions) are reused
+    async with httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        timeout=60.0,
+    ) as client:
+        bufo_urls_raw = await fetch_bufo_urls(client)
 
-    bufo_urls_map = {url.split("/")[-1]: url for url in bufo_urls_raw}
+        bufo_urls_map = {url.split("/")[-1]: url for url in bufo_urls_raw}
 
-    image_paths = await download_all_bufos(bufo_urls_raw, output_dir)
+        image_paths = await download_all_bufos(client, bufo_urls_raw, output_dir)
 
-    embeddings = await generate_embeddings(image_paths, voyage_api_key)
+        names, embeddings = await generate_embeddings(
+            client, image_paths, voyage_api_key, encoded_dir
+        )
 
-    await upload_to_turbopuffer(embeddings, bufo_urls_map, tpuf_api_key, tpuf_namespace)
+        await upload_to_turbopuffer(
+            client, names, embeddings, bufo_urls_map, tpuf_api_key, tpuf_namespace
+        )
 
     console.print("\n[bold green]ingestion complete![/bold green]")
 